@@ -1,88 +1,219 @@
 import os
 import re
+import csv
+import json
 import time
 import random
+import asyncio
+import functools
+import aiohttp
 import pandas as pd
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from pybloom_live import ScalableBloomFilter
 from tqdm import tqdm
+from tqdm.asyncio import tqdm as async_tqdm
+
+API_BASE_URL = 'https://www.googleapis.com/youtube/v3'
+DAILY_QUOTA_UNITS = 10000
+RATE_LIMIT_REASONS = ('rateLimitExceeded', 'userRateLimitExceeded')
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+CSV_CHUNK_SIZE = 100_000
+METADATA_FIELDS = ['Video ID', 'Title', 'Channel ID', 'Author', 'Description', 'Category', 'Topics',
+                   'Length (Seconds)', 'Published', 'Audio Language', 'Views', 'Tags']
+
+# One pass over the URL classifies it and captures its ID; the named group that matched gives the type.
+# Every branch is anchored to a youtube.com or youtu.be host, and watch URLs need a v= parameter.
+_URL_RE = re.compile(
+    r'(?<![\w-])(?:'
+    r'youtu\.be/(?P<short>[\w-]+)'
+    r'|youtube\.com/watch\?(?:[^#]*?&)?v=(?P<video>[\w-]+)'
+    r'|youtube\.com/playlist\?(?:[^#]*?&)?list=(?P<playlist>[\w-]+)'
+    r'|youtube\.com/channel/(?P<channel>[\w-]+)'
+    r'|youtube\.com/@(?P<handle>[\w.-]+)'
+    r')'
+)
+_DURATION_PATTERN = r'PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?'
+
+
+def parse_durations(durations):
+    """Convert a sequence of ISO 8601 durations (e.g., PT1H2M3S) to seconds in one vectorized pass."""
+    parts = pd.Series(durations, dtype='object').str.extract(_DURATION_PATTERN).fillna(0).astype('int32')
+    return parts[0] * 3600 + parts[1] * 60 + parts[2]
+
+
+class YouTubeAPIError(Exception):
+    """Raised when the YouTube Data API returns a non-2xx response to a request made with the key at key_index."""
+    def __init__(self, status, content, key_index=None):
+        super().__init__(f"HTTP {status}: {content}")
+        self.status = status
+        self.content = content
+        self.key_index = key_index
+
+
+class TokenBucket:
+    """Pace requests to at most `rate` per second, allowing bursts of up to `capacity`."""
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    async def acquire(self, tokens=1):
+        """Wait until `tokens` are available and take them from the bucket."""
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return
+            await asyncio.sleep((tokens - self.tokens) / self.rate)
+
 
 class YouTubeMetadataExtractor:
-    def __init__(self, api_key_file='api_keys.txt', input_urls_file='input_urls.txt', metadata_file='metadata.csv', final_file='videos.csv'):
+    def __init__(self, api_key_file='api_keys.txt', input_urls_file='input_urls.txt', metadata_file='metadata.csv', final_file='videos.csv', max_concurrency=16, quota_file='quota_usage.json', requests_per_second=10, burst_size=10):
         self.api_key_file = api_key_file
         self.input_urls_file = input_urls_file
         self.metadata_file = metadata_file
         self.final_file = final_file
+        self.max_concurrency = max_concurrency
+        self.quota_file = quota_file
         self.api_keys = self.load_api_keys()
         self.current_key_index = 0
-        self.youtube = self.create_youtube_service()
+        self.session = None
+        self.semaphore = None
+        self.buckets = [TokenBucket(requests_per_second, burst_size) for _ in self.api_keys]
+        self.quota_usage = self.load_quota_usage()
+        self.seen_video_ids = self.get_existing_video_ids()
+        self.metadata_header_written = os.path.exists(self.metadata_file)
+        self.metadata_fp = None
+        self.metadata_writer = None
 
     def load_api_keys(self):
         """Load API keys from a file."""
         with open(self.api_key_file, 'r') as f:
             return f.read().splitlines()
 
-    def create_youtube_service(self):
-        """Create YouTube API service using the current API key."""
-        return build('youtube', 'v3', developerKey=self.api_keys[self.current_key_index])
+    def quota_day(self):
+        """Return the current quota day; YouTube resets quotas at midnight Pacific time."""
+        return datetime.now(ZoneInfo('America/Los_Angeles')).strftime('%Y-%m-%d')
+
+    def load_quota_usage(self):
+        """Load today's per-key quota usage so a restarted run resumes where it left off."""
+        if os.path.exists(self.quota_file):
+            with open(self.quota_file, 'r') as f:
+                saved = json.load(f)
+            if saved.get('date') == self.quota_day():
+                return saved.get('usage', {})
+        return {}
+
+    def save_quota_usage(self):
+        """Persist today's per-key quota usage."""
+        with open(self.quota_file, 'w') as f:
+            json.dump({'date': self.quota_day(), 'usage': self.quota_usage}, f)
+
+    async def throttle(self, cost=1):
+        """Reserve quota and a rate-limit token for the current key before making a request."""
+        for _ in range(len(self.api_keys)):
+            if self.quota_usage.get(str(self.current_key_index), 0) + cost <= DAILY_QUOTA_UNITS:
+                break
+            print(f"Daily quota used up for API key {self.current_key_index + 1}/{len(self.api_keys)}. Switching to the next key...")
+            self.switch_api_key()
+        key_index = self.current_key_index
+        await self.buckets[key_index].acquire()
+        # Usage is keyed by the key's position in api_key_file so the keys themselves never land on disk
+        usage_key = str(key_index)
+        self.quota_usage[usage_key] = self.quota_usage.get(usage_key, 0) + cost
+        return key_index
 
     def switch_api_key(self):
         """Switch to the next API key when rate limit is exceeded."""
         self.current_key_index = (self.current_key_index + 1) % len(self.api_keys)
         if self.current_key_index == 0:
             print("All API keys exhausted. Exiting...")
+            self.save_quota_usage()
             exit(1)
-        self.youtube = self.create_youtube_service()
-        print(f"Switched to API key {self.api_keys[self.current_key_index]}")
-
-    def parse_url(self, url):
-        """Parse the YouTube URL and determine its type (video, playlist, or channel)."""
-        if 'youtube.com/watch' in url or 'youtu.be' in url:
-            return self.parse_video_url(url)
-        elif 'youtube.com/playlist' in url:
-            return self.parse_playlist_url(url)
-        elif 'youtube.com/channel' in url or '@' in url:
-            return self.parse_channel_url(url)
-        return None
-
-    def parse_video_url(self, url):
-        """Parse a video URL and return the video ID."""
-        if 'youtu.be' in url:
-            return {'type': 'video', 'video_id': url.split('/')[-1]}
-        match = re.search(r'[?&]v=([a-zA-Z0-9_-]+)', url)
-        if match:
-            return {'type': 'video', 'video_id': match.group(1)}
-        return None
-
-    def parse_playlist_url(self, url):
-        """Parse a playlist URL and return the playlist ID."""
-        match = re.search(r'list=([a-zA-Z0-9_-]+)', url)
-        return {'type': 'playlist', 'playlist_id': match.group(1)} if match else None
-
-    def parse_channel_url(self, url):
-        """Parse a channel URL and return the channel ID."""
-        if '/channel/' in url:
-            return {'type': 'channel', 'channel_id': url.split('/channel/')[-1]}
-        elif '/@' in url:
-            return {'type': 'channel', 'channel_id': url.split('/@')[-1]}
-        return None
-
-    def exponential_backoff(self, retries):
-        """Implement exponential backoff."""
-        wait_time = min(60, 2 ** retries)
-        print(f"Rate limit hit. Retrying in {wait_time} seconds...")
-        time.sleep(wait_time)
-
-    def fetch_videos_from_channel(self, channel_id):
+        self.save_quota_usage()
+        print(f"Switched to API key {self.current_key_index + 1}/{len(self.api_keys)}")
+
+    def open_session(self):
+        """Create the pooled HTTP session shared by all concurrent API requests."""
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency, ttl_dns_cache=300)
+        self.session = aiohttp.ClientSession(connector=connector)
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self.session
+
+    async def api_get(self, resource, max_retries=5, **params):
+        """Call a YouTube Data API list endpoint over the shared session and return the JSON body.
+
+        Rate-limited responses (429, or 403 with a rate-limit reason), transient 5xx errors,
+        and connection errors or timeouts are retried after the server's Retry-After delay,
+        falling back to exponential backoff.
+        """
+        params = {k: v for k, v in params.items() if v is not None}
+        for retries in range(max_retries + 1):
+            key_index = await self.throttle()
+            params['key'] = self.api_keys[key_index]
+            try:
+                async with self.semaphore:
+                    async with self.session.get(f"{API_BASE_URL}/{resource}", params=params) as response:
+                        body = await response.read()
+                        if response.status < 400:
+                            return json.loads(body)
+                        retry_after = response.headers.get('Retry-After')
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if retries == max_retries:
+                    raise
+                await self.exponential_backoff(retries)
+                continue
+            content = body.decode('utf-8', errors='replace')
+            retryable = response.status in RETRY_STATUSES or (
+                response.status == 403 and any(reason in content for reason in RATE_LIMIT_REASONS))
+            if not retryable or retries == max_retries:
+                raise YouTubeAPIError(response.status, content, key_index)
+            await self.exponential_backoff(retries, retry_after)
+
+    def handle_quota_error(self, key_index):
+        """Mark the key as used up for today and switch API keys once, even if several in-flight requests hit the quota."""
+        # Recorded as spent so throttle() skips this key after a restart on the same quota day
+        self.quota_usage[str(key_index)] = DAILY_QUOTA_UNITS
+        if key_index == self.current_key_index:
+            print(f"Quota exceeded for API key {key_index + 1}/{len(self.api_keys)}. Switching to the next key...")
+            self.switch_api_key()
+
+    @staticmethod
+    @functools.lru_cache(maxsize=1 << 20)
+    def parse_url(url):
+        """Parse the YouTube URL into a (type, id) tuple, where type is video, playlist, or channel."""
+        match = _URL_RE.search(url)
+        if not match:
+            return None
+        if match.group('video') or match.group('short'):
+            return ('video', match.group('video') or match.group('short'))
+        if match.group('playlist'):
+            return ('playlist', match.group('playlist'))
+        return ('channel', match.group('channel') or match.group('handle'))
+
+    async def exponential_backoff(self, retries, retry_after=None):
+        """Wait for the server-provided Retry-After delay, or back off exponentially."""
+        try:
+            wait_time = float(retry_after)
+        except (TypeError, ValueError):
+            wait_time = min(60, 2 ** retries + random.random())
+        print(f"Rate limit hit. Retrying in {wait_time:.1f} seconds...")
+        await asyncio.sleep(wait_time)
+
+    async def fetch_videos_from_channel(self, channel_id):
         """Fetch all video IDs from a channel using its uploads playlist."""
         try:
             print(f"Fetching videos for playlist ID {channel_id}...")
             # Step 1: Get the uploads playlist ID for the channel
-            request = self.youtube.channels().list(
+            response = await self.api_get(
+                'channels',
                 part='contentDetails',
                 id=channel_id
             )
-            response = request.execute()
 
             if 'items' in response and len(response['items']) > 0:
                 uploads_playlist_id = response['items'][0]['contentDetails']['relatedPlaylists']['uploads']
@@ -91,18 +222,19 @@ class YouTubeMetadataExtractor:
                 return []
 
             # Step 2: Fetch all video IDs from the uploads playlist
-            return self.fetch_videos_from_playlist(uploads_playlist_id)
+            return await self.fetch_videos_from_playlist(uploads_playlist_id)
         
-        except HttpError as e:
-            if e.resp.status == 403 and 'quotaExceeded' in e.content.decode('utf-8'):
-                print(f"Quota exceeded for API key {self.api_keys[self.current_key_index]}. Switching to the next key...")
-                self.switch_api_key()
-                return self.fetch_videos_from_channel(channel_id)
+        except YouTubeAPIError as e:
+            if e.status == 403 and 'quotaExceeded' in e.content:
+                self.handle_quota_error(e.key_index)
+                return await self.fetch_videos_from_channel(channel_id)
             else:
                 print(f"Error fetching videos for channel {channel_id}: {e}")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"Error fetching videos for channel {channel_id}: {e!r}")
         return []
 
-    def fetch_videos_from_playlist(self, playlist_id):
+    async def fetch_videos_from_playlist(self, playlist_id):
         """Fetch all video IDs from a playlist."""
         video_ids = []
         next_page_token = None
@@ -111,13 +243,13 @@ class YouTubeMetadataExtractor:
         while True:
             try:
                 print(f"Fetching videos for channel ID {playlist_id}...")
-                request = self.youtube.playlistItems().list(
+                response = await self.api_get(
+                    'playlistItems',
                     part='snippet',
                     playlistId=playlist_id,
                     maxResults=50,
                     pageToken=next_page_token
                 )
-                response = request.execute()
                 
                 # Extract video IDs from the playlist items
                 for item in response.get('items', []):
@@ -128,10 +260,9 @@ class YouTubeMetadataExtractor:
                 if not next_page_token:
                     break
 
-            except HttpError as e:
-                if e.resp.status == 403 and 'quotaExceeded' in e.content.decode('utf-8'):
-                    print(f"Quota exceeded for API key {self.api_keys[self.current_key_index]}. Switching to the next key...")
-                    self.switch_api_key()
+            except YouTubeAPIError as e:
+                if e.status == 403 and 'quotaExceeded' in e.content:
+                    self.handle_quota_error(e.key_index)
                     retries += 1
                     if retries > len(self.api_keys):
                         print("All API keys exhausted. Exiting...")
@@ -139,19 +270,35 @@ class YouTubeMetadataExtractor:
                 else:
                     print(f"Error fetching videos from playlist {playlist_id}: {e}")
                     break
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                print(f"Error fetching videos from playlist {playlist_id}: {e!r}")
+                break
 
         return video_ids
 
-    def fetch_video_metadata_batch(self, video_ids):
-        """Fetch metadata for multiple videos using batch requests."""
-        try:
-            request = self.youtube.videos().list(
-                part='snippet,statistics,contentDetails,topicDetails',
-                id=','.join(video_ids)
-            )
-            response = request.execute()
+    async def fetch_video_metadata_batch(self, video_ids):
+        """Fetch metadata for up to 50 videos with a single videos.list request."""
+        for _ in range(len(self.api_keys)):
+            try:
+                response = await self.api_get(
+                    'videos',
+                    part='snippet,statistics,contentDetails,topicDetails',
+                    id=','.join(video_ids)
+                )
+            except YouTubeAPIError as e:
+                if e.status == 403 and 'quotaExceeded' in e.content:
+                    self.handle_quota_error(e.key_index)
+                    continue
+                print(f"Error fetching metadata: {e}")
+                return []
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                print(f"Error fetching metadata: {e!r}")
+                return []
+
             metadata_list = []
+            raw_durations = []
             for item in response.get('items', []):
+                raw_durations.append(item['contentDetails'].get('duration'))
                 metadata_list.append({
                     'Video ID': item['id'],
                     'Title': item['snippet']['title'],
@@ -160,59 +307,71 @@ class YouTubeMetadataExtractor:
                     'Description': item['snippet'].get('description', ''),
                     'Category': item['snippet'].get('categoryId', ''),
                     'Topics': item.get('topicDetails', {}).get('topicCategories', []),
-                    'Length (Seconds)': self.parse_duration(item['contentDetails']['duration']),
+                    'Length (Seconds)': 0,
                     'Published': item['snippet']['publishedAt'],
                     'Audio Language': item['snippet'].get('defaultAudioLanguage', ''),
                     'Views': item['statistics'].get('viewCount', 0),
                     'Tags': item['snippet'].get('tags', [])
                 })
+
+            # Convert all durations in the batch at once rather than one regex per video
+            for row, seconds in zip(metadata_list, parse_durations(raw_durations).tolist()):
+                row['Length (Seconds)'] = seconds
             return metadata_list
-        except HttpError as e:
-            if e.resp.status == 403 and 'quotaExceeded' in e.content.decode('utf-8'):
-                self.switch_api_key()
-            else:
-                print(f"Error fetching metadata: {e}")
         return []
 
-    def parse_duration(self, duration):
-        """Convert YouTube ISO 8601 duration format to seconds."""
-        if not duration:
-            return 0  # Return 0 if duration is None or empty
-        
-        # Match the ISO 8601 duration format (e.g., PT1H2M3S)
-        match = re.match(r'PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?', duration)
-        if not match:
-            print(f"Invalid duration format: {duration}")
-            return 0  # Return 0 if the format is incorrect
-
-        # Extract hours, minutes, and seconds from the match groups
-        hours = int(match.group(1)) if match.group(1) else 0
-        minutes = int(match.group(2)) if match.group(2) else 0
-        seconds = int(match.group(3)) if match.group(3) else 0
-        return hours * 3600 + minutes * 60 + seconds
-
-
     def load_urls_from_file(self):
         """Load URLs from the input file."""
         with open(self.input_urls_file, 'r') as f:
             return f.read().splitlines()
 
     def get_existing_video_ids(self):
-        """Get existing video IDs from the CSV file."""
+        """Load existing video IDs from the CSV file into a Bloom filter."""
+        existing_video_ids = ScalableBloomFilter(initial_capacity=2_000_000, error_rate=0.001,
+                                                 mode=ScalableBloomFilter.LARGE_SET_GROWTH)
         if os.path.exists(self.metadata_file):
-            df = pd.read_csv(self.metadata_file)
-            return set(df['Video ID'].tolist())
-        return set()
+            for chunk in pd.read_csv(self.metadata_file, usecols=['Video ID'], chunksize=CSV_CHUNK_SIZE):
+                for video_id in chunk['Video ID']:
+                    existing_video_ids.add(video_id)
+        return existing_video_ids
+
+    def filter_saved_video_ids(self, video_ids):
+        """Return the video IDs that are really absent from the CSV file, resolving Bloom filter false positives."""
+        remaining = set(video_ids)
+        if remaining and os.path.exists(self.metadata_file):
+            for chunk in pd.read_csv(self.metadata_file, usecols=['Video ID'], chunksize=CSV_CHUNK_SIZE):
+                remaining.difference_update(chunk['Video ID'])
+        return remaining
+
+    def open_metadata_writer(self):
+        """Open the metadata CSV for appending, writing the header if the file is new."""
+        self.metadata_fp = open(self.metadata_file, 'a', newline='', encoding='utf-8')
+        self.metadata_writer = csv.DictWriter(self.metadata_fp, fieldnames=METADATA_FIELDS)
+        if not self.metadata_header_written:
+            self.metadata_writer.writeheader()
+            self.metadata_header_written = True
+
+    def close_metadata_writer(self):
+        """Close the metadata CSV if it is open."""
+        if self.metadata_fp is not None:
+            self.metadata_fp.close()
+            self.metadata_fp = None
+            self.metadata_writer = None
 
     def save_metadata_to_csv(self, metadata):
-        """Save metadata to CSV."""
-        df = pd.DataFrame(metadata)
-        df.to_csv(self.metadata_file, index=False, mode='a', header=not os.path.exists(self.metadata_file))
+        """Append metadata rows to the CSV and record the saved video IDs."""
+        if self.metadata_writer is None:
+            self.open_metadata_writer()
+        self.metadata_writer.writerows(metadata)
+        self.metadata_fp.flush()
+        for row in metadata:
+            self.seen_video_ids.add(row['Video ID'])
 
     def deduplicate_metadata(self):
         """Deduplicate metadata and save the final results."""
-        df = pd.read_csv(self.metadata_file)
-        df.drop_duplicates(subset='Video ID', keep='first', inplace=True)
+        # Arrow-backed strings let the Video ID hash run over contiguous UTF-8 buffers
+        df = pd.read_csv(self.metadata_file, dtype_backend='pyarrow')
+        df = df[~df['Video ID'].duplicated(keep='first')]
         df.to_csv(self.final_file, index=False)
         print(f"Deduplicated metadata saved to {self.final_file}")
 
@@ -231,37 +390,73 @@ class YouTubeMetadataExtractor:
 
     def process_urls(self):
         """Process URLs, fetch video metadata, and save results."""
-        urls = self.load_urls_from_file()
-        existing_video_ids = self.get_existing_video_ids()
-        all_video_ids = []
-
-        # Step 1: Parse URLs and gather video IDs
+        try:
+            asyncio.run(self.process_urls_async())
+        finally:
+            self.close_metadata_writer()
+            self.save_quota_usage()
+
+    async def iter_new_video_ids(self, urls):
+        """Yield each video ID referenced by the URLs once, skipping videos already saved."""
+        run_video_ids = set()
+        maybe_saved_video_ids = set()
         for url in tqdm(urls, desc="Processing URLs"):
             url_info = self.parse_url(url)
-            if url_info:
-                if url_info['type'] == 'video' and url_info['video_id'] not in existing_video_ids:
-                    all_video_ids.append(url_info['video_id'])
-                elif url_info['type'] == 'playlist':
-                    all_video_ids.extend(self.fetch_videos_from_playlist(url_info['playlist_id']))
-                elif url_info['type'] == 'channel':
-                    all_video_ids.extend(self.fetch_videos_from_channel(url_info['channel_id']))
-
-        # Step 2: Remove duplicates and filter out existing video IDs
-        all_video_ids = list(set(all_video_ids) - existing_video_ids)
-
-        # Step 3: Fetch video metadata in batches
-        metadata = []
-        batch_size = 50
-        for i in tqdm(range(0, len(all_video_ids), batch_size), desc="Fetching video metadata"):
-            batch_ids = all_video_ids[i:i + batch_size]
-            metadata.extend(self.fetch_video_metadata_batch(batch_ids))
-
-        # Step 4: Save metadata to CSV
-        self.save_metadata_to_csv(metadata)
+            if not url_info:
+                continue
+            url_type, identifier = url_info
+            if url_type == 'video':
+                video_ids = [identifier]
+            elif url_type == 'playlist':
+                video_ids = await self.fetch_videos_from_playlist(identifier)
+            else:
+                video_ids = await self.fetch_videos_from_channel(identifier)
+
+            for video_id in video_ids:
+                if video_id in run_video_ids:
+                    continue
+                if video_id in self.seen_video_ids:
+                    # Either already saved or a Bloom filter false positive; checked exactly below
+                    maybe_saved_video_ids.add(video_id)
+                    continue
+                run_video_ids.add(video_id)
+                yield video_id
+
+        for video_id in self.filter_saved_video_ids(maybe_saved_video_ids - run_video_ids):
+            yield video_id
+
+    async def iter_video_id_batches(self, urls, batch_size=50):
+        """Group new video IDs into API-sized batches as they are discovered."""
+        batch = []
+        async for video_id in self.iter_new_video_ids(urls):
+            batch.append(video_id)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    async def fetch_and_save_batch(self, video_ids):
+        """Fetch metadata for one batch of video IDs and append it to the CSV as soon as it arrives."""
+        self.save_metadata_to_csv(await self.fetch_video_metadata_batch(video_ids))
+
+    async def process_urls_async(self):
+        """Gather video IDs and fetch their metadata concurrently over one pooled session."""
+        urls = self.load_urls_from_file()
+
+        async with self.open_session():
+            # Steps 1-3: Parse URLs and fetch each batch of new video IDs as soon as it fills;
+            # every batch is saved by its own task, even while later URLs are still being expanded
+            tasks = [
+                asyncio.create_task(self.fetch_and_save_batch(batch_ids))
+                async for batch_ids in self.iter_video_id_batches(urls)
+            ]
+            for task in async_tqdm.as_completed(tasks, desc="Fetching video metadata"):
+                await task
         print(f"Metadata saved to {self.metadata_file}")
 
-        # Step 5: Deduplicate metadata
+        # Step 4: Deduplicate metadata
         self.deduplicate_metadata()
 
-        # Step 6: Generate a report
-        self.report()
\ No newline at end of file
+        # Step 5: Generate a report
+        self.report()
@@ -1,8 +1,12 @@
 import os
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pv
+import pyarrow.parquet as pq
 from googleapiclient.discovery import build
 from dotenv import load_dotenv
 from tqdm import tqdm
+from concurrent.futures import ThreadPoolExecutor
 
 # Load the API key from the .env file
 load_dotenv()
@@ -13,64 +17,91 @@ def initialize_youtube_api():
     if not YOUTUBE_API_KEY:
         print("Error: YouTube API key not found. Please set it in the .env file.")
         return None
-    return build('youtube', 'v3', developerKey=YOUTUBE_API_KEY)
+    return build('youtube', 'v3', developerKey=YOUTUBE_API_KEY, cache_discovery=False, static_discovery=True)
 
-def fetch_channel_metadata(youtube, channel_id):
-    """Fetch channel metadata using the YouTube Data API."""
-    try:
-        request = youtube.channels().list(
-            part="snippet,statistics",
-            id=channel_id
-        )
-        response = request.execute()
-
-        if "items" not in response or not response["items"]:
-            return None
-
-        channel_info = response["items"][0]
-        channel_data = {
-            "Channel ID": channel_id,
-            "Channel Name": channel_info["snippet"]["title"],
-            "Subscribers": int(channel_info["statistics"].get("subscriberCount", 0)),
-            "Total Videos": int(channel_info["statistics"].get("videoCount", 0)),
-            "Created Date": channel_info["snippet"]["publishedAt"].split("T")[0]
-        }
-        return channel_data
-    except Exception as e:
-        print(f"Error fetching channel data for Channel ID {channel_id}: {e}")
-        return None
+CHANNEL_COLUMNS = ["Channel ID", "Channel Name", "Subscribers", "Total Videos", "Created Date"]
+CHANNELS_PER_REQUEST = 50  # Maximum number of IDs accepted by channels.list
 
-def load_existing_channel_metadata(file_path):
-    """Load existing channel metadata from CSV file."""
+def fetch_channels_metadata(youtube, channel_ids):
+    """Fetch metadata for many channels, 50 IDs per channels.list request."""
+    channels = {}
+    for i in tqdm(range(0, len(channel_ids), CHANNELS_PER_REQUEST), desc="Fetching YouTube Metadata"):
+        batch_ids = channel_ids[i:i + CHANNELS_PER_REQUEST]
+        try:
+            request = youtube.channels().list(
+                part="snippet,statistics",
+                id=",".join(batch_ids),
+                maxResults=CHANNELS_PER_REQUEST
+            )
+            response = request.execute()
+        except Exception as e:
+            print(f"Error fetching channel data for Channel IDs {batch_ids}: {e}")
+            continue
+
+        for channel_info in response.get("items", []):
+            channels[channel_info["id"]] = {
+                "Channel ID": channel_info["id"],
+                "Channel Name": channel_info["snippet"]["title"],
+                "Subscribers": int(channel_info["statistics"].get("subscriberCount", 0)),
+                "Total Videos": int(channel_info["statistics"].get("videoCount", 0)),
+                "Created Date": channel_info["snippet"]["publishedAt"].split("T")[0]
+            }
+    return channels
+
+def load_existing_channel_ids(file_path):
+    """Load the IDs of channels already saved in the channel metadata CSV file."""
     if os.path.exists(file_path):
         try:
-            return pd.read_csv(file_path)
+            return set(pd.read_csv(file_path, usecols=['Channel ID'])['Channel ID'])
         except Exception as e:
             print(f"Error reading existing channel metadata: {e}")
-            return pd.DataFrame()
-    return pd.DataFrame()
+            return set()
+    return set()
 
-def load_csv_files_from_directory(directory):
-    """Load and merge all CSV files from the specified directory."""
-    all_files = [os.path.join(directory, f) for f in os.listdir(directory) if f.endswith('.csv')]
-    dataframes = []
+NUMERIC_COLUMNS = {'Length (Seconds)': pa.int64(), 'Views': pa.int64()}
 
-    for file in tqdm(all_files, desc="Loading CSV Files"):
-        try:
-            df = pd.read_csv(file)
-            df.columns = df.columns.str.strip()
-            dataframes.append(df)
-        except Exception as e:
-            print(f"Error reading file {file}: {e}")
+def read_metadata_file(file):
+    """Read one CSV or Parquet file as an Arrow table with stripped column names, or return None if it cannot be parsed."""
+    try:
+        if file.endswith('.parquet'):
+            table = pq.read_table(file, use_threads=False)
+        else:
+            # Descriptions span lines, so quoted newlines must be allowed
+            table = pv.read_csv(file, read_options=pv.ReadOptions(use_threads=False),
+                                parse_options=pv.ParseOptions(newlines_in_values=True),
+                                convert_options=pv.ConvertOptions(strings_can_be_null=True))
+        table = table.rename_columns([column.strip() for column in table.column_names])
+        # Channel totals sum Views and Length (Seconds), so those are int64 everywhere and the rest is text
+        return table.cast(pa.schema([(column, NUMERIC_COLUMNS.get(column, pa.string())) for column in table.column_names]))
+    except Exception as e:
+        print(f"Error reading file {file}: {e}")
+        return None
+
+def load_csv_files_from_directory(directory):
+    """Load and merge all CSV and Parquet files from the specified directory."""
+    with os.scandir(directory) as entries:
+        all_files = [entry.path for entry in entries if entry.is_file() and entry.name.endswith(('.csv', '.parquet'))]
+
+    # One worker per file; read_metadata_file turns off pyarrow's own threads so the pool does not oversubscribe
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        results = tqdm(executor.map(read_metadata_file, all_files), total=len(all_files), desc="Loading CSV Files")
+        tables = [table for table in results if table is not None]
     
-    if not dataframes:
-        print("No valid CSV files found in the directory.")
+    if not tables:
+        print("No valid CSV or Parquet files found in the directory.")
         return pd.DataFrame()
 
-    merged_df = pd.concat(dataframes, ignore_index=True)
-    return merged_df
+    # Channel aggregation needs a single frame, so the Arrow tables are merged and converted once
+    merged_table = pa.concat_tables(tables, promote_options='default')
+    return merged_table.to_pandas(types_mapper=pd.ArrowDtype)
+
+def aggregate_unique_values(df, column):
+    """Join the unique comma-separated values of a column for each channel."""
+    values = df[['Channel ID', column]].dropna()
+    values = values.assign(**{column: values[column].str.split(',')}).explode(column)
+    return values.drop_duplicates().groupby('Channel ID')[column].agg(', '.join)
 
-def extract_and_enrich_channel_data(df, youtube, existing_channels):
+def extract_and_enrich_channel_data(df, youtube, existing_channel_ids):
     """Extract unique channels and enrich with YouTube metadata."""
     if 'Channel ID' not in df.columns:
         print("Error: 'Channel ID' column not found in the CSV files.")
@@ -83,24 +114,18 @@ def extract_and_enrich_channel_data(df, youtube, existing_channels):
     channel_data = df.groupby('Channel ID').agg(
         Total_Views=('Views', 'sum'),
         Total_Videos=('Video ID', 'nunique'),
-        Total_Hours=('Length (Hours)', 'sum'),
-        Tags=('Tags', lambda x: ', '.join(set(sum(x.dropna().str.split(',').tolist(), [])))),
-        Topics=('Topics', lambda x: ', '.join(set(sum(x.dropna().str.split(',').tolist(), []))))
-    ).reset_index()
+        Total_Hours=('Length (Hours)', 'sum')
+    )
+    for column in ('Tags', 'Topics'):
+        channel_data[column] = aggregate_unique_values(df, column).reindex(channel_data.index, fill_value='')
+    channel_data = channel_data.reset_index()
 
     # Filter out channels that are already in the existing metadata
-    new_channels = channel_data[~channel_data['Channel ID'].isin(existing_channels['Channel ID'])]
-
-    enriched_data = []
-
-    for _, row in tqdm(new_channels.iterrows(), total=len(new_channels), desc="Fetching YouTube Metadata"):
-        channel_id = row['Channel ID']
-        api_data = fetch_channel_metadata(youtube, channel_id)
-        if api_data:
-            row = {**row, **api_data}
-        enriched_data.append(row)
+    new_channels = channel_data[~channel_data['Channel ID'].isin(existing_channel_ids)]
 
-    enriched_df = pd.DataFrame(enriched_data)
+    api_data = fetch_channels_metadata(youtube, new_channels['Channel ID'].tolist())
+    api_df = pd.DataFrame(list(api_data.values()), columns=CHANNEL_COLUMNS)
+    enriched_df = new_channels.merge(api_df, on='Channel ID', how='left')
 
     # Ensure columns are in the correct order
     if not enriched_df.empty:
@@ -111,16 +136,13 @@ def extract_and_enrich_channel_data(df, youtube, existing_channels):
 
     return enriched_df
 
-def save_to_csv(df, output_file):
-    """Save the DataFrame to a CSV file."""
+def save_to_csv(df, output_file, seen_channel_ids):
+    """Append channels not already in seen_channel_ids to the CSV file."""
+    df = df[~df['Channel ID'].isin(seen_channel_ids)]
     if not df.empty:
         try:
-            if os.path.exists(output_file):
-                # Append to the existing CSV file
-                existing_df = pd.read_csv(output_file)
-                df = pd.concat([existing_df, df]).drop_duplicates(subset=['Channel ID'], keep='last')
-            
-            df.to_csv(output_file, index=False, encoding='utf-8')
+            df.to_csv(output_file, mode='a', index=False, header=not os.path.exists(output_file), encoding='utf-8')
+            seen_channel_ids.update(df['Channel ID'])
             print(f"Channel metadata saved to '{output_file}'")
         except Exception as e:
             print(f"Error saving CSV file: {e}")
@@ -135,8 +157,8 @@ def main():
         print("YouTube API initialization failed.")
         return
 
-    # Load video data from all CSV files in the "metadata" directory
-    print("Loading data from CSV files...")
+    # Load video data from all CSV and Parquet files in the "metadata" directory
+    print("Loading data from metadata files...")
     df = load_csv_files_from_directory(metadata_dir)
     if df.empty:
         print("No data available for processing.")
@@ -144,18 +166,18 @@ def main():
 
     # Load existing channel metadata
     print("Loading existing channel metadata...")
-    existing_channels = load_existing_channel_metadata(output_file)
+    existing_channel_ids = load_existing_channel_ids(output_file)
 
     # Extract and enrich channel data
     print("Extracting and enriching channel data...")
-    enriched_channel_data = extract_and_enrich_channel_data(df, youtube, existing_channels)
+    enriched_channel_data = extract_and_enrich_channel_data(df, youtube, existing_channel_ids)
     if enriched_channel_data.empty:
         print("No new channel data generated.")
         return
 
     # Save enriched data to CSV
     print("Saving enriched data to CSV...")
-    save_to_csv(enriched_channel_data, output_file)
+    save_to_csv(enriched_channel_data, output_file, existing_channel_ids)
 
 if __name__ == "__main__":
     main()
@@ -1,39 +1,60 @@
 import os
+import glob
 import shutil
-import pandas as pd
+import duckdb
 from datetime import datetime
 
-def load_csv_files_from_directory(directory):
-    """Load all CSV files in the specified directory into a single DataFrame."""
-    all_files = [os.path.join(directory, f) for f in os.listdir(directory) if f.endswith('.csv')]
-    if not all_files:
-        print(f"No CSV files found in directory: {directory}")
-        return pd.DataFrame()
-
-    dataframes = [pd.read_csv(file) for file in all_files]
-    merged_df = pd.concat(dataframes, ignore_index=True)
-    return merged_df
-
-def deduplicate_dataframe(df, key_column="Video ID"):
-    """Remove duplicates from the DataFrame based on a specific column."""
-    if key_column not in df.columns:
-        print(f"Column '{key_column}' not found in DataFrame.")
-        return df
-    
-    # Remove duplicates
-    before_dedup = len(df)
-    deduplicated_df = df.drop_duplicates(subset=[key_column], keep='first').reset_index(drop=True)
-    after_dedup = len(deduplicated_df)
+NUMERIC_COLUMNS = ["Length (Seconds)", "Views"]
+
+def metadata_source(input_directory):
+    """Build a DuckDB relation over all CSV and Parquet files in input_directory, or None if there are none."""
+    csv_pattern = os.path.join(input_directory, "*.csv")
+    parquet_pattern = os.path.join(input_directory, "*.parquet")
+    sources = []
+    if glob.glob(csv_pattern):
+        # Read CSVs as text so values are written back exactly as they were scraped
+        sources.append(f"SELECT * FROM read_csv('{csv_pattern}', header=true, all_varchar=true, union_by_name=true)")
+    if glob.glob(parquet_pattern):
+        sources.append(f"SELECT * FROM read_parquet('{parquet_pattern}', union_by_name=true)")
+    if not sources:
+        return None
+    return "(" + " UNION ALL BY NAME ".join(sources) + ")"
+
+def deduplicate_metadata_files(input_directory, output_directory="metadata", key_column="Video ID", output_format="parquet"):
+    """Deduplicate all metadata files in input_directory on key_column and save the result to a timestamped file.
+
+    DuckDB streams the files instead of loading them all into a pandas DataFrame. The result is
+    written as zstd-compressed Parquet by default; pass output_format="csv" for a CSV export.
+    """
+    source = metadata_source(input_directory)
+    if source is None:
+        print(f"No CSV or Parquet files found in directory: {input_directory}")
+        return None
+
+    with duckdb.connect() as con:
+        columns = [row[0] for row in con.execute(f"DESCRIBE SELECT * FROM {source}").fetchall()]
+        if key_column not in columns:
+            print(f"Column '{key_column}' not found in metadata files.")
+            return None
+
+        before_dedup = con.execute(f"SELECT count(*) FROM {source}").fetchone()[0]
+
+        # Store counts as integers rather than text
+        casts = [f'TRY_CAST("{column}" AS BIGINT) AS "{column}"' for column in NUMERIC_COLUMNS if column in columns]
+        select = f'SELECT DISTINCT ON ("{key_column}") * REPLACE ({", ".join(casts)}) FROM {source}' if casts \
+            else f'SELECT DISTINCT ON ("{key_column}") * FROM {source}'
+
+        os.makedirs(output_directory, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"{output_directory}/deduplicated_{timestamp}.{output_format}"
+        if output_format == "parquet":
+            options = "FORMAT PARQUET, COMPRESSION ZSTD, ROW_GROUP_SIZE 100000"
+        else:
+            options = "HEADER"
+        # COPY returns the number of rows it wrote, so no separate distinct count is needed
+        after_dedup = con.execute(f"COPY ({select}) TO '{filename}' ({options})").fetchone()[0]
 
     print(f"Removed {before_dedup - after_dedup} duplicate entries.")
-    return deduplicated_df
-
-def save_to_csv(df, output_directory="metadata"):
-    """Save the deduplicated DataFrame to a CSV file with a timestamped filename."""
-    os.makedirs(output_directory, exist_ok=True)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"{output_directory}/deduplicated_{timestamp}.csv"
-    df.to_csv(filename, index=False, encoding='utf-8')
     print(f"Deduplicated data saved to {filename}")
     return filename
 
@@ -56,19 +77,13 @@ def main():
     archive_directory = "archive"
     temp_directory = "deduplication"
 
-    # Load CSV files from the directory
-    df = load_csv_files_from_directory(input_directory)
+    # Deduplicate the metadata files into a temporary Parquet file
+    deduplicated_file = deduplicate_metadata_files(input_directory, output_directory=temp_directory, key_column="Video ID")
 
-    if df.empty:
+    if not deduplicated_file:
         print("No data to deduplicate.")
         return
 
-    # Deduplicate the DataFrame
-    deduplicated_df = deduplicate_dataframe(df, key_column="Video ID")
-
-    # Save the deduplicated DataFrame temporarily
-    deduplicated_file = save_to_csv(deduplicated_df, output_directory=temp_directory)
-
     # Move original files to archive
     move_files_to_archive(input_directory, archive_directory)
 
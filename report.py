@@ -1,42 +1,72 @@
 import os
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pv
+import pyarrow.parquet as pq
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+def format_durations(seconds):
+    """Convert a Series of seconds to strings in the appropriate time unit (milliseconds, seconds, minutes, hours)."""
+    seconds = pd.Series(seconds)
+    values = seconds.to_numpy(dtype='float64', na_value=np.nan)
+    conditions = [values < 1, values < 60, values < 3600]
+    scaled = np.select(conditions, [values * 1000, values, values / 60], default=values / 3600)
+    units = np.select(conditions, [' milliseconds', ' seconds', ' minutes'], default=' hours')
+    return pd.Series(np.char.add(np.char.mod('%.2f', scaled), units), index=seconds.index)
 
 def format_duration(seconds):
     """Automatically convert seconds to appropriate time units (milliseconds, seconds, minutes, hours)."""
-    if seconds < 1:
-        # Convert to milliseconds
-        milliseconds = seconds * 1000
-        return f"{milliseconds:.2f} milliseconds"
-    elif seconds < 60:
-        return f"{seconds:.2f} seconds"
-    elif seconds < 3600:
-        minutes = seconds / 60
-        return f"{minutes:.2f} minutes"
-    else:
-        hours = seconds / 3600
-        return f"{hours:.2f} hours"
+    return format_durations(pd.Series([seconds])).iloc[0]
+
+
+# Only the columns the analyses below actually use are loaded
+REPORT_COLUMNS = ['Video ID', 'Channel ID', 'Length (Seconds)', 'Audio Language', 'Category', 'Topics', 'Views']
+REPORT_TYPES = {'Views': pa.int64(), 'Length (Seconds)': pa.int64()}
 
+def read_report_file(file):
+    """Read the report columns of one CSV or Parquet file as an Arrow table, or return None if it lacks 'Audio Language'."""
+    if file.endswith('.parquet'):
+        header = {column: column for column in pq.read_schema(file).names}
+    else:
+        # Map stripped column names back to the raw header so include_columns matches
+        header = {column.strip(): column for column in pd.read_csv(file, nrows=0).columns}
+    if 'Audio Language' not in header:
+        print(f"Warning: 'Audio Language' column not found in {file}. Skipping...")
+        return None
+
+    columns = [header[column] for column in REPORT_COLUMNS if column in header]
+    if file.endswith('.parquet'):
+        table = pq.read_table(file, columns=columns, use_threads=False)
+    else:
+        table = pv.read_csv(
+            file,
+            read_options=pv.ReadOptions(use_threads=False),
+            parse_options=pv.ParseOptions(newlines_in_values=True),  # Descriptions span lines
+            convert_options=pv.ConvertOptions(include_columns=columns, strings_can_be_null=True)
+        )
+    table = table.rename_columns([column.strip() for column in table.column_names])  # Remove extra spaces in column names
+    # Views and lengths are summed by the analyses, so they are int64 in every file; all else is text
+    return table.cast(pa.schema([(column, REPORT_TYPES.get(column, pa.string())) for column in table.column_names]))
 
 def load_csv_files_from_directory(directory):
-    """Load all CSV files in the specified directory into a single DataFrame."""
-    all_files = [os.path.join(directory, f) for f in os.listdir(directory) if f.endswith('.csv')]
-    dataframes = []
-    
-    for file in all_files:
-        df = pd.read_csv(file)
-        df.columns = df.columns.str.strip()  # Remove extra spaces in column names
-        if 'Audio Language' not in df.columns:
-            print(f"Warning: 'Audio Language' column not found in {file}. Skipping...")
-            continue
-        dataframes.append(df)
+    """Load all CSV and Parquet files in the specified directory into a single DataFrame."""
+    with os.scandir(directory) as entries:
+        all_files = [entry.path for entry in entries if entry.is_file() and entry.name.endswith(('.csv', '.parquet'))]
+
+    # The report spreads whole files across cores, so each file is read single-threaded above
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        tables = [table for table in executor.map(read_report_file, all_files) if table is not None]
     
-    if not dataframes:
-        print("No valid CSV files with the required columns found.")
+    if not tables:
+        print("No valid CSV or Parquet files with the required columns found.")
         return pd.DataFrame()
     
-    merged_df = pd.concat(dataframes, ignore_index=True)
-    return merged_df
+    # Merge before converting, so the report builds one pandas frame instead of one per file
+    merged_table = pa.concat_tables(tables, promote_options='default')
+    return merged_table.to_pandas(types_mapper=pd.ArrowDtype)
 
 def analyze_total_duration(df):
     """Calculate total, min, max, and average duration of all videos."""
@@ -58,66 +88,73 @@ def analyze_channel_and_video_count(df):
     unique_channels = df['Channel ID'].nunique()
     return total_videos, unique_channels
 
+def add_duration_columns(stats):
+    """Insert formatted duration columns after the raw sum/min/max/mean columns of an aggregated frame."""
+    stats.insert(4, 'Total Duration', format_durations(stats['sum']))
+    stats.insert(5, 'Min Duration', format_durations(stats['min']))
+    stats.insert(6, 'Max Duration', format_durations(stats['max']))
+    stats.insert(7, 'Avg Duration', format_durations(stats['mean']))
+    return stats
+
+def summarize_by(df, column):
+    """Compute duration metrics, video count, and total views per value of a column in one groupby pass."""
+    stats = df.groupby(column).agg(**{
+        'sum': ('Length (Seconds)', 'sum'),
+        'min': ('Length (Seconds)', 'min'),
+        'max': ('Length (Seconds)', 'max'),
+        'mean': ('Length (Seconds)', 'mean'),
+        'Video Count': ('Video ID', 'size'),
+        'Total Views': ('Views', 'sum'),
+    })
+    return add_duration_columns(stats)
+
 def analyze_language_distribution(df):
     """Analyze the distribution of videos by language with duration metrics."""
-    language_counts = df['Audio Language'].value_counts()
-    language_duration = df.groupby('Audio Language')['Length (Seconds)']
-    
-    language_stats = language_duration.agg(['sum', 'min', 'max', 'mean'])
-    language_stats['Total Duration'] = language_stats['sum'].apply(format_duration)
-    language_stats['Min Duration'] = language_stats['min'].apply(format_duration)
-    language_stats['Max Duration'] = language_stats['max'].apply(format_duration)
-    language_stats['Avg Duration'] = language_stats['mean'].apply(format_duration)
-    language_stats['Video Count'] = language_counts
-    language_stats['Total Views'] = df.groupby('Audio Language')['Views'].sum()
-    
+    language_stats = summarize_by(df, 'Audio Language')
     return language_stats.reset_index().rename(columns={'index': 'Audio Language'})
 
 def analyze_domain_distribution(df):
     """Analyze the distribution of videos by domain (Category) with duration metrics."""
-    domain_counts = df['Category'].value_counts()
-    domain_duration = df.groupby('Category')['Length (Seconds)']
-    
-    domain_stats = domain_duration.agg(['sum', 'min', 'max', 'mean'])
-    domain_stats['Total Duration'] = domain_stats['sum'].apply(format_duration)
-    domain_stats['Min Duration'] = domain_stats['min'].apply(format_duration)
-    domain_stats['Max Duration'] = domain_stats['max'].apply(format_duration)
-    domain_stats['Avg Duration'] = domain_stats['mean'].apply(format_duration)
-    domain_stats['Video Count'] = domain_counts
-    domain_stats['Total Views'] = df.groupby('Category')['Views'].sum()
-    
+    domain_stats = summarize_by(df, 'Category')
     return domain_stats.reset_index().rename(columns={'index': 'Category'})
 
 def analyze_topic_distribution(df):
     """Analyze the distribution of videos by topic with duration metrics."""
-    df['Topics'] = df['Topics'].fillna('').apply(lambda x: x.split(', ') if x else [])
-    exploded_df = df.explode('Topics')
-    
-    topic_counts = exploded_df['Topics'].value_counts()
-    topic_duration = exploded_df.groupby('Topics')['Length (Seconds)']
-    
-    topic_stats = topic_duration.agg(['sum', 'min', 'max', 'mean'])
-    topic_stats['Total Duration'] = topic_stats['sum'].apply(format_duration)
-    topic_stats['Min Duration'] = topic_stats['min'].apply(format_duration)
-    topic_stats['Max Duration'] = topic_stats['max'].apply(format_duration)
-    topic_stats['Avg Duration'] = topic_stats['mean'].apply(format_duration)
-    topic_stats['Video Count'] = topic_counts
-    topic_stats['Total Views'] = exploded_df.groupby('Topics')['Views'].sum()
+    # Split and explode the topics with Arrow compute kernels instead of a per-row Python split
+    topics = pc.split_pattern(pa.array(df['Topics'].fillna(''), type=pa.string()), pattern=', ')
+    video_index = pc.list_parent_indices(topics)
+    exploded = pa.table({
+        'Topics': pc.list_flatten(topics),
+        'Length (Seconds)': pa.array(df['Length (Seconds)']).take(video_index),
+        'Views': pa.array(df['Views']).take(video_index),
+    })
+    exploded = exploded.filter(pc.not_equal(exploded['Topics'], ''))
+
+    topic_stats = exploded.group_by('Topics').aggregate([
+        ('Length (Seconds)', 'sum'),
+        ('Length (Seconds)', 'min'),
+        ('Length (Seconds)', 'max'),
+        ('Length (Seconds)', 'mean'),
+        ([], 'count_all'),
+        ('Views', 'sum'),
+    ]).to_pandas().set_index('Topics').sort_index()
+    topic_stats.columns = ['sum', 'min', 'max', 'mean', 'Video Count', 'Total Views']
+    topic_stats = add_duration_columns(topic_stats)
     
     return topic_stats.reset_index().rename(columns={'index': 'Topic'})
 
 def analyze_duplicates(df):
     """Analyze and count duplicate videos based on 'Video ID'."""
-    duplicate_videos = df[df.duplicated(subset='Video ID', keep=False)]
-    num_duplicates = len(duplicate_videos)
-    unique_duplicates = duplicate_videos['Video ID'].nunique()
+    mask = df['Video ID'].duplicated(keep=False)
+    num_duplicates = int(mask.sum())
+    unique_duplicates = df.loc[mask, 'Video ID'].nunique()
     
     print(f"Total Duplicate Entries: {num_duplicates}")
     print(f"Unique Duplicate Videos: {unique_duplicates}")
     
-    return duplicate_videos, num_duplicates, unique_duplicates
+    return num_duplicates, unique_duplicates
 
-def save_analysis_to_csv(language_analysis, domain_analysis, topic_analysis, total_seconds, total_videos, unique_channels, duplicates_df, num_duplicates, unique_duplicates, overall_stats, filename):
+def save_analysis_to_csv(language_analysis, domain_analysis, topic_analysis, total_seconds, total_videos, unique_channels, num_duplicates, unique_duplicates, overall_stats, filename):
     """Save the analysis DataFrame to a CSV file."""
     with open(filename, 'w', newline='', encoding='utf-8') as file:
         file.write(f"Total Duration of All Videos: {format_duration(total_seconds)}\n")
@@ -161,7 +198,7 @@ def main():
     language_analysis = analyze_language_distribution(df)
     domain_analysis = analyze_domain_distribution(df)
     topic_analysis = analyze_topic_distribution(df)
-    duplicates_df, num_duplicates, unique_duplicates = analyze_duplicates(df)
+    num_duplicates, unique_duplicates = analyze_duplicates(df)
 
     output_filename = 'analysis.csv'
     save_analysis_to_csv(
@@ -171,7 +208,6 @@ def main():
         overall_stats[0],
         total_videos,
         unique_channels,
-        duplicates_df,
         num_duplicates,
         unique_duplicates,
         overall_stats,
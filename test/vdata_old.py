@@ -1,7 +1,9 @@
 import os
+import re
 import csv
-import subprocess
+import runpy
 import isodate
+import pyarrow.parquet as pq
 from datetime import datetime
 from tqdm import tqdm
 from googleapiclient.discovery import build
@@ -47,20 +49,21 @@ def build_youtube_service():
         switch_api_key()
         return build_youtube_service()
 
+# Playlist, video, channel and handle URLs matched in a single scan
+_URL_RE = re.compile(
+    r'(?:playlist\?list=(?P<playlist>[^&]+))'
+    r'|(?:(?:watch\?v=|/v/|youtu\.be/|shorts/)(?P<video>[A-Za-z0-9_-]+))'
+    r'|(?:/channel/(?P<channel>[^/?]+))'
+    r'|(?:@(?P<handle>[^/?]+))'
+)
+URL_TYPES = {"playlist": "playlist", "video": "video", "channel": "channel_id", "handle": "handle"}
+
 def extract_identifier(url):
-    if "playlist?list=" in url:
-        return url.split("list=")[1], "playlist"
-    elif "watch?v=" in url:
-        return url.split("watch?v=")[1].split("&")[0], "video"
-    elif "youtu.be/" in url:
-        return url.split("youtu.be/")[1].split("?")[0], "video"
-    elif "shorts/" in url:
-        return url.split("shorts/")[1].split("?")[0], "video"
-    elif "/channel/" in url:
-        return url.split("/channel/")[1], "channel_id"
-    elif "@" in url:
-        return url.split("@")[1], "handle"
-    return None, None
+    match = _URL_RE.search(url)
+    if not match:
+        return None, None
+    url_type = match.lastgroup
+    return match.group(url_type), URL_TYPES[url_type]
 
 def resolve_handle_to_channel_id(handle):
     youtube = build_youtube_service()
@@ -106,6 +109,9 @@ def check_existing_video_ids(video_ids):
             with open(os.path.join("metadata", file), mode='r', newline='', encoding='utf-8') as csvfile:
                 reader = csv.DictReader(csvfile)
                 existing_ids.update(row['Video ID'] for row in reader)
+        elif file.endswith(".parquet"):
+            table = pq.read_table(os.path.join("metadata", file), columns=['Video ID'])
+            existing_ids.update(table.column('Video ID').to_pylist())
     return [video_id for video_id in video_ids if video_id not in existing_ids]
 
 def get_video_metadata(video_ids):
@@ -159,9 +165,10 @@ def save_to_csv(data):
         writer.writeheader()
         writer.writerows(data)
 
-    subprocess.run(["python", "report.py"], check=True)
-    subprocess.run(["python", "cdata.py"], check=True)
-    subprocess.run(["python", "deduplication.py"], check=True)
+    # Run the post-processing scripts in this interpreter instead of spawning one per script.
+    # They stay sequential: deduplication archives the files report and cdata read.
+    for script in ("report.py", "cdata.py", "deduplication.py"):
+        runpy.run_path(script, run_name="__main__")
 
 def process_urls(urls):
     all_video_data = []
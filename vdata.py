@@ -1,14 +1,37 @@
 import os
+import sys
 import csv
 import subprocess
-import time
+import random
+import asyncio
+import functools
+import itertools
+import threading
+import aiohttp
 import isodate
+import pyarrow.parquet as pq
 from datetime import datetime
 from tqdm import tqdm
+from tqdm.asyncio import tqdm as async_tqdm
+from concurrent.futures import ThreadPoolExecutor
 from googleapiclient.discovery import build
+from googleapiclient.model import JsonModel
 import re
 import traceback
 
+try:
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+except ImportError:
+    pass
+
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    import json
+    json_loads = json.loads
+
 # Load API keys from a file or environment variable
 def load_api_keys():
     try:
@@ -21,8 +44,29 @@ def load_api_keys():
 API_KEY = os.getenv("YOUTUBE_API_KEY")
 YOUTUBE_API_SERVICE_NAME = "youtube"
 YOUTUBE_API_VERSION = "v3"
+YOUTUBE_API_URL = "https://www.googleapis.com/youtube/v3"
+MAX_CONCURRENT_REQUESTS = 10
+MAX_RETRIES = 5
+# Partial-response filter: only the fields video_row reads are sent back
+VIDEO_FIELDS = ("items(id,snippet(title,channelId,channelTitle,description,categoryId,publishedAt,"
+                "defaultAudioLanguage,tags),contentDetails/duration,statistics/viewCount,topicDetails/topicCategories)")
+# Redraw progress bars at most every 2 seconds, and not at all when stderr is redirected to a log
+PROGRESS_OPTIONS = {"mininterval": 2.0, "disable": not sys.stderr.isatty()}
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+RATE_LIMIT_REASONS = (b'rateLimitExceeded', b'userRateLimitExceeded')
+METADATA_FILE = os.path.join("metadata", "metadata.csv")
+SEEN_IDS_FILE = os.path.join("metadata", "seen_ids.txt")
+_SEEN_IDS = None  # Video IDs already saved or being fetched, loaded on first use
+_seen_ids_lock = threading.Lock()
+_metadata_lock = threading.Lock()
 API_KEYS = load_api_keys() or [API_KEY]  # Use API_KEY as fallback if no keys are loaded
-current_key_index = 0
+# Each thread holds its own API key, handed out round-robin on first use
+_key_state = threading.local()
+_next_key_index = itertools.count()
+
+METADATA_FIELDS = ("Video ID", "Title", "Channel ID", "Author", "Description",
+                   "Category", "Topics", "Length (Seconds)", "Published",
+                   "Audio Language", "Views", "Tags")
 
 CATEGORY_MAPPING = {
     "1": "Film & Animation", "2": "Autos & Vehicles", "10": "Music",
@@ -37,46 +81,85 @@ def log_error(message):
     with open("error_log.txt", "a") as log_file:
         log_file.write(f"{datetime.now()} - {message}\n")
 
+def current_key_index():
+    """Return the index of the API key used by the calling thread."""
+    if not hasattr(_key_state, 'index'):
+        _key_state.index = next(_next_key_index) % len(API_KEYS)
+    return _key_state.index
+
 def switch_api_key():
-    """Switch to the next available API key."""
-    global current_key_index
-    current_key_index = (current_key_index + 1) % len(API_KEYS)
-    print(f"Switching to API key {current_key_index + 1}/{len(API_KEYS)}")
-
-def build_youtube_service():
-    """Build the YouTube service using the current API key."""
-    api_key = API_KEYS[current_key_index]
+    """Switch the calling thread to the next available API key."""
+    _key_state.index = (current_key_index() + 1) % len(API_KEYS)
+    print(f"Switching to API key {_key_state.index + 1}/{len(API_KEYS)}")
+
+class FastJsonModel(JsonModel):
+    """googleapiclient response model that parses bodies with orjson when it is available."""
+    def deserialize(self, content):
+        try:
+            body = json_loads(content)
+        except ValueError:
+            return content.decode("utf-8") if isinstance(content, bytes) else content
+        if self._data_wrapper and "data" in body:
+            body = body["data"]
+        return body
+
+def build_youtube_service(key_index):
+    """Build the YouTube service for an API key once per thread and reuse it, keeping its HTTP connection alive."""
+    # httplib2 connections are not thread-safe, so the cache lives in thread-local state.
+    # static_discovery loads the YouTube v3 discovery document bundled with googleapiclient instead of fetching it.
+    services = _key_state.__dict__.setdefault('services', {})
+    if key_index in services:
+        return services[key_index]
+    api_key = API_KEYS[key_index]
     try:
-        print(f"Using API Key {current_key_index + 1}/{len(API_KEYS)}")
-        return build(YOUTUBE_API_SERVICE_NAME, YOUTUBE_API_VERSION, developerKey=api_key)
+        print(f"Using API Key {key_index + 1}/{len(API_KEYS)}")
+        services[key_index] = build(YOUTUBE_API_SERVICE_NAME, YOUTUBE_API_VERSION, developerKey=api_key,
+                                    cache_discovery=False, static_discovery=True, model=FastJsonModel())
+        return services[key_index]
     except Exception as e:
         log_error(f"Failed to build YouTube service: {e}")
         switch_api_key()
-        return build_youtube_service()
+        return build_youtube_service(current_key_index())
+
+# Playlist, video, channel and handle URLs matched in a single scan
+_URL_RE = re.compile(
+    r'(?:playlist\?list=(?P<playlist>[^&]+))'
+    r'|(?:(?:watch\?v=|/v/|youtu\.be/|shorts/)(?P<video>[A-Za-z0-9_-]+))'
+    r'|(?:/channel/(?P<channel>[^/?]+))'
+    r'|(?:@(?P<handle>[^/?]+))'
+)
+URL_TYPES = {"playlist": "playlist", "video": "video", "channel": "channel_id", "handle": "handle"}
+
+# Watch and playlist URLs on these hosts are split with C-level string search before the regex is tried
+_CANONICAL_PREFIXES = frozenset(f"{scheme}{host}youtube.com/" for scheme in ("https://", "http://", "")
+                                for host in ("www.", "m.", ""))
 
 def extract_identifier(url):
     """Extract the identifier (video, playlist, channel, handle) from the URL."""
-    match_playlist = re.search(r'playlist\?list=([^&]+)', url)
-    match_video = re.search(r'(?:watch\?v=|\/v\/)([a-zA-Z0-9_-]+)', url)
-    match_channel = re.search(r'\/channel\/([^/]+)', url)
-    match_handle = re.search(r'@([^/]+)', url)
-    
-    if match_playlist:
-        return match_playlist.group(1), "playlist"
-    elif match_video:
-        return match_video.group(1), "video"
-    elif match_channel:
-        return match_channel.group(1), "channel_id"
-    elif match_handle:
-        return match_handle.group(1), "handle"
-    return None, None
+    start = url.find("watch?v=")
+    if start >= 0 and url[:start] in _CANONICAL_PREFIXES:
+        identifier = url[start + 8:].partition('&')[0]
+        if identifier.isascii() and identifier.replace('-', '').replace('_', '').isalnum():
+            return identifier, "video"
+    start = url.find("playlist?list=")
+    if start >= 0 and url[:start] in _CANONICAL_PREFIXES:
+        identifier = url[start + 14:].partition('&')[0]
+        if identifier:
+            return identifier, "playlist"
+
+    match = _URL_RE.search(url)
+    if not match:
+        return None, None
+    url_type = match.lastgroup
+    return match.group(url_type), URL_TYPES[url_type]
 
 def resolve_handle_to_channel_id(handle):
     """Resolve a YouTube handle to a channel ID."""
-    youtube = build_youtube_service()
+    youtube = build_youtube_service(current_key_index())
     try:
-        request = youtube.search().list(part="snippet", q=handle, type="channel", maxResults=1)
-        response = request.execute()
+        request = youtube.search().list(part="snippet", q=handle, type="channel", maxResults=1,
+                                        fields="items/snippet/channelId")
+        response = request.execute(num_retries=3)
         if response.get('items'):
             return response['items'][0]['snippet']['channelId']
     except Exception as e:
@@ -86,127 +169,263 @@ def resolve_handle_to_channel_id(handle):
 # Using the error handler decorator
 def handle_errors(func):
     """Decorator to handle errors and switch API keys if needed."""
+    def on_error(e):
+        log_error(f"Error in {func.__name__}: {e}")
+        traceback.print_exc()
+        switch_api_key()
+
+    if asyncio.iscoroutinefunction(func):
+        async def async_wrapper(*args, **kwargs):
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                on_error(e)
+                return None
+        return async_wrapper
+
     def wrapper(*args, **kwargs):
         try:
             return func(*args, **kwargs)
         except Exception as e:
-            log_error(f"Error in {func.__name__}: {e}")
-            traceback.print_exc()
-            switch_api_key()
+            on_error(e)
             return None
     return wrapper
 
 @handle_errors
 def get_playlist_videos(playlist_id):
     """Retrieve all video IDs from a playlist."""
-    youtube = build_youtube_service()
+    youtube = build_youtube_service(current_key_index())
     video_ids = []
-    request = youtube.playlistItems().list(part="contentDetails", playlistId=playlist_id, maxResults=50)
+    request = youtube.playlistItems().list(part="contentDetails", playlistId=playlist_id, maxResults=50,
+                                           fields="items/contentDetails/videoId,nextPageToken")
     while request:
-        response = request.execute()
+        response = request.execute(num_retries=3)
         video_ids.extend(item['contentDetails']['videoId'] for item in response.get('items', []))
         request = youtube.playlistItems().list_next(request, response)
     return video_ids
 
 @handle_errors
 def get_channel_videos(channel_id):
-    """Retrieve all video IDs from a channel."""
-    youtube = build_youtube_service()
-    video_ids = []
-    request = youtube.search().list(part="id", channelId=channel_id, maxResults=50, type="video")
-    while request:
-        response = request.execute()
-        video_ids.extend(item['id']['videoId'] for item in response.get('items', []) if 'videoId' in item['id'])
-        request = youtube.search().list_next(request, response)
-    return video_ids
+    """Retrieve all video IDs from a channel via its uploads playlist."""
+    youtube = build_youtube_service(current_key_index())
+    # search.list costs 100 units a page and stops at 500 results; the uploads playlist costs 1 and is complete
+    response = youtube.channels().list(part="contentDetails", id=channel_id,
+                                       fields="items/contentDetails/relatedPlaylists/uploads").execute(num_retries=3)
+    items = response.get('items', [])
+    if not items:
+        log_error(f"Channel '{channel_id}' not found.")
+        return []
+    uploads_playlist_id = items[0]['contentDetails']['relatedPlaylists']['uploads']
+    return get_playlist_videos(uploads_playlist_id)
+
+# YouTube durations are almost always PT#H#M#S; anything else falls back to isodate
+_DURATION_RE = re.compile(r'PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?')
 
+@functools.lru_cache(maxsize=4096)
 def parse_duration(duration):
     """Parse ISO 8601 duration into total seconds."""
+    match = _DURATION_RE.fullmatch(duration) if duration else None
+    if match:
+        hours, minutes, seconds = match.groups()
+        return int(hours or 0) * 3600 + int(minutes or 0) * 60 + int(seconds or 0)
     try:
         return int(isodate.parse_duration(duration).total_seconds())
     except Exception:
         return 0
 
-def check_existing_video_ids(video_ids):
-    """Check which video IDs are not already present in CSV files."""
-    existing_ids = set()
+def _load_seen_ids():
+    """Load the saved video IDs from the index file, building it from the metadata files if it is missing."""
+    if os.path.exists(SEEN_IDS_FILE):
+        with open(SEEN_IDS_FILE, mode='r', encoding='utf-8') as f:
+            return set(f.read().split())
+
+    seen_ids = set()
     metadata_dir = "metadata"
-    for file in os.listdir(metadata_dir):
-        if file.endswith(".csv"):
-            with open(os.path.join(metadata_dir, file), mode='r', newline='', encoding='utf-8') as csvfile:
-                reader = csv.DictReader(csvfile)
-                existing_ids.update(row['Video ID'] for row in reader)
-    return [video_id for video_id in video_ids if video_id not in existing_ids]
+    os.makedirs(metadata_dir, exist_ok=True)
+    with os.scandir(metadata_dir) as entries:
+        files = [entry for entry in entries if entry.is_file()]
+    for entry in files:
+        if entry.name.endswith(".csv"):
+            with open(entry.path, mode='r', newline='', encoding='utf-8', buffering=1 << 20) as csvfile:
+                reader = csv.reader(csvfile)
+                header = next(reader, None)
+                if not header or 'Video ID' not in header:
+                    continue
+                index = header.index('Video ID')
+                seen_ids.update(row[index] for row in reader if len(row) > index)
+        elif entry.name.endswith(".parquet"):
+            table = pq.read_table(entry.path, columns=['Video ID'])
+            seen_ids.update(table.column('Video ID').to_pylist())
+    seen_ids.discard('')
+    seen_ids.discard(None)
+
+    with open(SEEN_IDS_FILE, mode='w', encoding='utf-8') as f:
+        f.write("".join(f"{video_id}\n" for video_id in seen_ids))
+    return seen_ids
+
+def check_existing_video_ids(video_ids):
+    """Check which video IDs are not already saved or claimed by another URL, and claim them."""
+    global _SEEN_IDS
+    with _seen_ids_lock:
+        if _SEEN_IDS is None:
+            _SEEN_IDS = _load_seen_ids()
+        # Also drop repeats within video_ids, keeping the first occurrence
+        requested_ids = set()
+        new_ids = [
+            video_id for video_id in video_ids
+            if video_id not in _SEEN_IDS and not (video_id in requested_ids or requested_ids.add(video_id))
+        ]
+        # Claimed up front so later and concurrent URLs skip videos already being fetched
+        _SEEN_IDS.update(new_ids)
+    return new_ids
+
+# Bound once so the per-item row builder skips repeated attribute lookups
+_category_name = CATEGORY_MAPPING.get
+_join_values = ', '.join
+
+def video_row(item):
+    """Flatten one videos.list item into a metadata row tuple in METADATA_FIELDS order."""
+    snippet_get = item.get('snippet', {}).get
+    content_details_get = item.get('contentDetails', {}).get
+    statistics_get = item.get('statistics', {}).get
+    topics = item.get('topicDetails', {}).get('topicCategories', [])
+
+    return (
+        item['id'],
+        snippet_get('title'),
+        snippet_get('channelId'),
+        snippet_get('channelTitle'),
+        snippet_get('description'),
+        _category_name(snippet_get('categoryId', 'Unknown'), "Unknown"),
+        _join_values(topics),
+        parse_duration(content_details_get('duration')),
+        snippet_get('publishedAt'),
+        snippet_get('defaultAudioLanguage', 'Unknown'),
+        statistics_get('viewCount', '0'),
+        _join_values(snippet_get('tags', []))
+    )
+
+async def fetch_video_batch(session, semaphore, batch_ids):
+    """Fetch metadata for up to 50 video IDs, backing off on transient errors and rotating keys on quota errors."""
+    params = {
+        "part": "snippet,contentDetails,statistics,topicDetails",
+        "id": ",".join(batch_ids),
+        "fields": VIDEO_FIELDS
+    }
+    attempt = 0
+    quota_errors = 0
+    while attempt < MAX_RETRIES:
+        key_index = current_key_index()
+        try:
+            async with semaphore:
+                async with session.get(f"{YOUTUBE_API_URL}/videos", params={**params, "key": API_KEYS[key_index]}) as response:
+                    status = response.status
+                    body = await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            status, body = None, str(e).encode()
+
+        if status == 200:
+            payload = json_loads(body)
+            return [video_row(item) for item in payload.get('items', [])]
+
+        if status == 403 and b'quotaExceeded' in body:
+            # Waiting will not help until the quota resets, so move on to the next key straight away
+            log_error(f"Quota exceeded for API key {key_index + 1}/{len(API_KEYS)}")
+            quota_errors += 1
+            if quota_errors >= len(API_KEYS):
+                print("All API keys are out of quota, skipping batch.")
+                return []
+            if key_index == current_key_index():  # Another batch may already have switched
+                switch_api_key()
+            continue
+
+        log_error(f"Error fetching metadata: HTTP {status}: {body[:200]!r}")
+        # A 403 can also be a per-second rate limit, which clears after a short wait
+        rate_limited = status == 403 and any(reason in body for reason in RATE_LIMIT_REASONS)
+        if status is not None and status not in RETRY_STATUSES and not rate_limited:
+            print(f"Request failed with HTTP {status}, skipping batch.")
+            return []
+        attempt += 1
+        if attempt < MAX_RETRIES:
+            delay = min(2 ** attempt + random.random(), 60)
+            print(f"Retrying in {delay:.1f} seconds...")
+            await asyncio.sleep(delay)
+    print(f"Max retries reached, skipping batch.")
+    return []
 
 @handle_errors
-def get_video_metadata(video_ids):
-    """Fetch metadata for a batch of video IDs."""
-    youtube = build_youtube_service()
-    video_data = []
-    for i in tqdm(range(0, len(video_ids), 50), desc="Fetching Video Metadata"):
-        batch_ids = video_ids[i:i + 50]
-        request = youtube.videos().list(part="snippet,contentDetails,statistics,topicDetails", id=",".join(batch_ids))
-        retries = 3
-        while retries > 0:
-            try:
-                response = request.execute()
-                for item in response.get('items', []):
-                    snippet = item.get('snippet', {})
-                    content_details = item.get('contentDetails', {})
-                    statistics = item.get('statistics', {})
-                    topics = item.get('topicDetails', {}).get('topicCategories', [])
-                    category = CATEGORY_MAPPING.get(snippet.get('categoryId', 'Unknown'), "Unknown")
-
-                    video_data.append({
-                        "Video ID": item['id'],
-                        "Title": snippet.get('title'),
-                        "Channel ID": snippet.get('channelId'),
-                        "Author": snippet.get('channelTitle'),
-                        "Description": snippet.get('description'),
-                        "Category": category,
-                        "Topics": ', '.join(topics),
-                        "Length (Seconds)": parse_duration(content_details.get('duration')),
-                        "Published": snippet.get('publishedAt'),
-                        "Audio Language": snippet.get('defaultAudioLanguage', 'Unknown'),
-                        "Views": statistics.get('viewCount', '0'),
-                        "Tags": ', '.join(snippet.get('tags', []))
-                    })
-                break
-            except Exception as e:
-                log_error(f"Error fetching metadata: {e}")
-                retries -= 1
-                if retries > 0:
-                    print(f"Retrying in 5 seconds...")
-                    time.sleep(5)
-                else:
-                    print(f"Max retries reached, skipping batch.")
-    return video_data
-
-def save_to_csv(data):
-    """Save video metadata to a CSV file."""
+async def get_video_metadata(video_ids, csvfile, writer):
+    """Fetch metadata for all video IDs concurrently, writing each batch as it arrives."""
+    batches = [video_ids[i:i + 50] for i in range(0, len(video_ids), 50)]
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=20)) as session:
+        tasks = [fetch_video_batch(session, semaphore, batch_ids) for batch_ids in batches]
+        for batch in async_tqdm.as_completed(tasks, desc="Fetching Video Metadata", **PROGRESS_OPTIONS):
+            save_to_csv(csvfile, writer, await batch)
+
+def open_metadata_csv():
+    """Open the rolling metadata CSV for appending and return the file and its writer, writing the header if the file is new."""
     os.makedirs("metadata", exist_ok=True)
-    filename = f"metadata/metadata_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}.csv"
-    fieldnames = ["Video ID", "Title", "Channel ID", "Author", "Description",
-                  "Category", "Topics", "Length (Seconds)", "Published",
-                  "Audio Language", "Views", "Tags"]
-
-    with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(data)
-
-def process_url(url):
-    """Process a single YouTube URL and fetch/save metadata."""
+    write_header = not os.path.exists(METADATA_FILE)
+    csvfile = open(METADATA_FILE, 'a', newline='', encoding='utf-8', buffering=1 << 20)
+    writer = csv.writer(csvfile)
+    if write_header:
+        writer.writerow(METADATA_FIELDS)
+    return csvfile, writer
+
+def save_to_csv(csvfile, writer, rows):
+    """Append a batch of video metadata rows to the CSV and index their IDs once they are on disk."""
+    # Rows are already in METADATA_FIELDS order, so csv.writer takes them as they are.
+    # Worker threads share one writer, so whole batches are written and indexed under the lock;
+    # a crash or Ctrl-C then never leaves saved rows missing from the seen-ID index.
+    with _metadata_lock:
+        writer.writerows(rows)
+        csvfile.flush()
+        record_seen_ids([row[0] for row in rows])
+
+def record_seen_ids(new_ids):
+    """Append newly saved video IDs to the seen-ID index file."""
+    if new_ids:
+        with _seen_ids_lock, open(SEEN_IDS_FILE, mode='a', encoding='utf-8') as f:
+            f.write("\n".join(new_ids) + "\n")
+
+def process_url(url, csvfile=None, writer=None):
+    """Process a single YouTube URL and fetch/save metadata.
+
+    Rows go to the given CSV file and writer, or to a freshly opened metadata CSV if none is given.
+    """
     identifier, url_type = extract_identifier(url)
     
-    if url_type == "playlist":
+    if url_type == "handle":
+        identifier = resolve_handle_to_channel_id(identifier)
+        video_ids = get_channel_videos(identifier) if identifier else []
+    elif url_type == "playlist":
         video_ids = get_playlist_videos(identifier)
     elif url_type == "channel_id":
         video_ids = get_channel_videos(identifier)
+    elif url_type == "video":
+        video_ids = [identifier]
     else:
         print(f"Unsupported URL type: {url_type}")
         return
+    if not video_ids:
+        return
     
     video_ids = check_existing_video_ids(video_ids)
-    video_data = get_video_metadata(video_ids)
-    save_to_csv(video_data)
+    if writer is not None:
+        asyncio.run(get_video_metadata(video_ids, csvfile, writer))
+        return
+
+    csvfile, writer = open_metadata_csv()
+    with csvfile:
+        asyncio.run(get_video_metadata(video_ids, csvfile, writer))
+
+def process_urls(urls):
+    """Process YouTube URLs concurrently; URL work is I/O-bound, so threads overlap the API round trips."""
+    check_existing_video_ids([])  # Load the seen-ID index before the workers start
+    csvfile, writer = open_metadata_csv()
+    # The pool is shut down before the file closes, so every worker has finished writing
+    with csvfile, ThreadPoolExecutor(max_workers=len(API_KEYS) * 4) as executor:
+        for _ in tqdm(executor.map(functools.partial(process_url, csvfile=csvfile, writer=writer), urls),
+                      total=len(urls), desc="Processing URLs", **PROGRESS_OPTIONS):
+            pass